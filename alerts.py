@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Motor de alertas de preço e variação
+
+Cada ação mantém dois índices ordenados de limites (um para regras de
+alta e outro para regras de baixa). A cada nova cotação só é percorrida
+a fatia de limites que fica entre o preço anterior e o novo preço, então
+o custo por atualização depende das regras disparadas e não do total de
+regras cadastradas.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+import itertools
+import math
+import queue
+import threading
+
+import requests
+
+ABOVE = 'above'
+BELOW = 'below'
+
+
+class RuleLimitError(Exception):
+    """Limite de regras cadastradas atingido"""
+
+
+def _finite(value, name):
+    """Converter para float rejeitando NaN/infinito (quebrariam a ordenação)"""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Valor inválido para {name}: {value}")
+    return value
+
+
+class _SymbolIndex:
+    """Limites ordenados de uma ação
+
+    Cada lado guarda a lista ordenada de (limite, rule_id) e, na mesma
+    posição, a lista só de limites usada pelo bisect. As duas são mantidas
+    em sincronia a cada inclusão/remoção, sem reordenar tudo.
+    """
+
+    def __init__(self):
+        self.above = []  # lista de (limite, rule_id)
+        self.below = []
+        self.above_keys = []
+        self.below_keys = []
+        self.last_price = None
+
+    def _side(self, direction):
+        if direction == ABOVE:
+            return self.above, self.above_keys
+        return self.below, self.below_keys
+
+    def add(self, direction, threshold, rule_id):
+        entries, keys = self._side(direction)
+        entry = (threshold, rule_id)
+        pos = bisect_left(entries, entry)
+        entries.insert(pos, entry)
+        keys.insert(pos, threshold)
+
+    def remove(self, direction, threshold, rule_id):
+        entries, keys = self._side(direction)
+        entry = (threshold, rule_id)
+        pos = bisect_left(entries, entry)
+        if pos < len(entries) and entries[pos] == entry:
+            del entries[pos]
+            del keys[pos]
+
+
+class QueueNotifier:
+    """Entrega os alertas disparados em uma fila local
+
+    A fila é circular: quando cheia, os alertas mais antigos são descartados.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.queue = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+
+    def __call__(self, alerts):
+        with self._lock:
+            dropped = max(0, len(self.queue) + len(alerts) - self.queue.maxlen)
+            self.queue.extend(alerts)
+        if dropped:
+            print(f"⚠️ Fila de alertas cheia, {dropped} alertas antigos descartados")
+
+    def __len__(self):
+        return len(self.queue)
+
+    def peek(self, offset=0, limit=None):
+        """Listar os alertas pendentes sem retirá-los da fila"""
+        with self._lock:
+            end = None if limit is None else offset + limit
+            return list(itertools.islice(self.queue, offset, end))
+
+    def drain(self, limit=None):
+        """Retirar os alertas pendentes (os mais antigos primeiro)"""
+        with self._lock:
+            count = len(self.queue) if limit is None else min(limit, len(self.queue))
+            return [self.queue.popleft() for _ in range(count)]
+
+
+class WebhookNotifier:
+    """Envia os alertas disparados para um webhook via POST
+
+    Cada lote de alertas vira um único POST, feito por uma thread em segundo
+    plano para que a atualização de cotações nunca espere pela rede.
+    """
+
+    def __init__(self, url, timeout=5, maxsize=1000):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    def __call__(self, alerts):
+        try:
+            self.queue.put_nowait(alerts)
+        except queue.Full:
+            print(f"⚠️ Fila do webhook cheia, descartando {len(alerts)} alertas")
+
+    def _worker(self):
+        while True:
+            alerts = self.queue.get()
+            try:
+                response = requests.post(self.url, json={'alerts': alerts}, timeout=self.timeout)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"❌ Erro ao enviar {len(alerts)} alertas para webhook - {e}")
+
+
+class AlertEngine:
+    """Motor de regras de alerta por cruzamento de limite"""
+
+    def __init__(self, notifiers=None, max_rules=None):
+        self.notifiers = list(notifiers) if notifiers else []
+        self.max_rules = max_rules
+        self._indexes = {}
+        self._rules = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add_rule(self, symbol, threshold, direction=ABOVE, message=None):
+        """Cadastrar regra que dispara quando o preço cruza o limite"""
+        if direction not in (ABOVE, BELOW):
+            raise ValueError(f"Direção inválida: {direction}")
+
+        threshold = _finite(threshold, 'threshold')
+        with self._lock:
+            if self.max_rules is not None and len(self._rules) >= self.max_rules:
+                raise RuleLimitError(f"Limite de {self.max_rules} regras atingido")
+
+            rule_id = next(self._ids)
+            index = self._indexes.setdefault(symbol, _SymbolIndex())
+            index.add(direction, threshold, rule_id)
+            self._rules[rule_id] = {
+                'rule_id': rule_id,
+                'symbol': symbol,
+                'threshold': threshold,
+                'direction': direction,
+                'message': message
+            }
+        return rule_id
+
+    def add_variation_rule(self, symbol, base_price, variation_pct, message=None):
+        """Cadastrar regra de variação percentual sobre um preço base
+
+        Variação positiva vira regra de alta e negativa vira regra de baixa,
+        ex.: COGN3 acima de last_signal_price + 10%.
+        """
+        base_price = _finite(base_price, 'base_price')
+        variation_pct = _finite(variation_pct, 'variation')
+        threshold = base_price * (1 + variation_pct / 100)
+        direction = ABOVE if variation_pct >= 0 else BELOW
+        return self.add_rule(symbol, threshold, direction, message)
+
+    def remove_rule(self, rule_id):
+        """Remover uma regra cadastrada"""
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+
+            index = self._indexes[rule['symbol']]
+            index.remove(rule['direction'], rule['threshold'], rule_id)
+        return True
+
+    def __len__(self):
+        return len(self._rules)
+
+    def get_rules(self, symbol=None, offset=0, limit=None):
+        """Listar regras cadastradas (em ordem de cadastro)"""
+        with self._lock:
+            rules = (rule for rule in self._rules.values()
+                     if symbol is None or rule['symbol'] == symbol)
+            end = None if limit is None else offset + limit
+            return [dict(rule) for rule in itertools.islice(rules, offset, end)]
+
+    def update(self, symbol, price):
+        """Processar nova cotação e retornar os alertas disparados
+
+        A primeira cotação de cada ação só define o preço de referência.
+        """
+        alerts = self._evaluate(symbol, price)
+        self._notify(alerts)
+        return alerts
+
+    def update_many(self, prices):
+        """Processar um lote de cotações {symbol: price}
+
+        Os notificadores recebem todos os alertas do lote de uma só vez.
+        """
+        alerts = []
+        for symbol, price in prices.items():
+            alerts.extend(self._evaluate(symbol, price))
+        self._notify(alerts)
+        return alerts
+
+    def _notify(self, alerts):
+        if not alerts:
+            return
+        for notifier in self.notifiers:
+            notifier(alerts)
+
+    def _evaluate(self, symbol, price):
+        with self._lock:
+            index = self._indexes.setdefault(symbol, _SymbolIndex())
+            previous = index.last_price
+            index.last_price = price
+
+            if previous is None or price == previous:
+                return []
+
+            if price > previous:
+                # Limites em (anterior, atual]
+                start = bisect_right(index.above_keys, previous)
+                end = bisect_right(index.above_keys, price)
+                crossed = index.above[start:end]
+            else:
+                # Limites em [atual, anterior)
+                start = bisect_left(index.below_keys, price)
+                end = bisect_left(index.below_keys, previous)
+                crossed = index.below[start:end]
+
+            if not crossed:
+                return []
+
+            timestamp = datetime.now().strftime('%H:%M:%S')
+            alerts = []
+            for threshold, rule_id in crossed:
+                rule = self._rules[rule_id]
+                alerts.append({
+                    'rule_id': rule_id,
+                    'symbol': symbol,
+                    'direction': rule['direction'],
+                    'threshold': threshold,
+                    'previous_price': previous,
+                    'price': price,
+                    'message': rule['message'],
+                    'timestamp': timestamp
+                })
+
+        return alerts
+
+
+def run_benchmark(total_rules=100000, ticks=1000, symbols=None):
+    """Benchmark do motor com muitas regras e atualizações aleatórias"""
+    import random
+    import time
+
+    symbols = symbols or ['CASH3', 'AERI3', 'ANIM3', 'COGN3', 'ONCO3', 'COIN11']
+    base_prices = {symbol: random.uniform(1, 100) for symbol in symbols}
+
+    engine = AlertEngine()
+
+    start = time.perf_counter()
+    for _ in range(total_rules):
+        symbol = random.choice(symbols)
+        engine.add_variation_rule(symbol, base_prices[symbol], random.uniform(-20, 20))
+    elapsed_add = time.perf_counter() - start
+
+    # Preço inicial (referência)
+    engine.update_many(base_prices)
+
+    prices = dict(base_prices)
+    fired = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for symbol in symbols:
+            prices[symbol] *= 1 + random.uniform(-0.002, 0.002)
+            fired += len(engine.update(symbol, prices[symbol]))
+    elapsed_ticks = time.perf_counter() - start
+
+    # Regras mudando entre as cotações (uma inclusão e uma remoção por cotação)
+    rule_ids = [rule['rule_id'] for rule in engine.get_rules()]
+    elapsed_churn_rules = 0
+    elapsed_churn_updates = 0
+    for _ in range(ticks):
+        for symbol in symbols:
+            victim = rule_ids.pop(random.randrange(len(rule_ids)))
+            start = time.perf_counter()
+            rule_ids.append(engine.add_variation_rule(symbol, prices[symbol],
+                                                      random.uniform(-20, 20)))
+            engine.remove_rule(victim)
+            elapsed_churn_rules += time.perf_counter() - start
+
+            prices[symbol] *= 1 + random.uniform(-0.002, 0.002)
+            start = time.perf_counter()
+            engine.update(symbol, prices[symbol])
+            elapsed_churn_updates += time.perf_counter() - start
+
+    updates = ticks * len(symbols)
+    print(f"Regras cadastradas: {total_rules} em {elapsed_add:.3f}s")
+    print(f"Atualizações: {updates} em {elapsed_ticks:.3f}s "
+          f"({elapsed_ticks / updates * 1e6:.1f}µs por cotação)")
+    print(f"Alertas disparados: {fired}")
+    print(f"Com regras mudando: {elapsed_churn_updates / updates * 1e6:.1f}µs por cotação, "
+          f"{elapsed_churn_rules / updates * 1e6:.1f}µs por inclusão+remoção")
+
+
+if __name__ == '__main__':
+    run_benchmark()
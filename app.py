@@ -3,14 +3,17 @@
 Sistema de Sinais para Ações Brasileiras
 """
 
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, render_template_string, jsonify, request
 from flask_cors import CORS
 import json
+import os
 from datetime import datetime
 import requests
 import yfinance as yf
 import time
 
+from alerts import AlertEngine, QueueNotifier, WebhookNotifier, RuleLimitError, ABOVE
+
 app = Flask(__name__)
 CORS(app)
 
@@ -79,6 +82,19 @@ STOCK_DATA = {
 quotations_cache = {}
 last_update_time = None
 
+# Motor de alertas (fila local + webhook opcional)
+# O estado fica em memória no processo: use um único worker do gunicorn
+alerts_queue = QueueNotifier(maxsize=10000)
+alert_notifiers = [alerts_queue]
+if os.environ.get('ALERT_WEBHOOK_URL'):
+    alert_notifiers.append(WebhookNotifier(os.environ['ALERT_WEBHOOK_URL']))
+alert_engine = AlertEngine(alert_notifiers,
+                           max_rules=int(os.environ.get('MAX_ALERT_RULES', 10000)))
+
+# Paginação das listagens de alertas/regras
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
 def get_current_quotations():
     """Buscar cotações atuais com múltiplas tentativas"""
     global quotations_cache, last_update_time
@@ -144,6 +160,12 @@ def get_current_quotations():
     quotations_cache = quotations
     last_update_time = datetime.now()
     
+    # Avaliar regras de alerta só com cotações reais (estimativas têm ruído aleatório)
+    fired = alert_engine.update_many({symbol: info['price'] for symbol, info in quotations.items()
+                                      if info['success']})
+    if fired:
+        print(f"🔔 {len(fired)} alertas disparados")
+    
     print(f"Cotações atualizadas: {successful_updates}/{len(SELECTED_STOCKS)} sucessos")
     return quotations
 
@@ -643,6 +665,89 @@ def analyze_now():
             'error': str(e)
         }), 500
 
+def get_pagination():
+    """Ler offset/limit da query string"""
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return offset, min(max(1, limit), MAX_PAGE_SIZE)
+
+@app.route('/api/alerts', methods=['GET', 'DELETE'])
+def api_alerts():
+    """Listar alertas disparados (DELETE também os retira da fila)"""
+    offset, limit = get_pagination()
+    
+    if request.method == 'DELETE':
+        alerts = alerts_queue.drain(limit)
+    else:
+        alerts = alerts_queue.peek(offset, limit)
+    
+    return jsonify({
+        'success': True,
+        'alerts': alerts,
+        'pending': len(alerts_queue)
+    })
+
+@app.route('/api/alerts/rules', methods=['GET', 'POST'])
+def api_alert_rules():
+    """Listar ou cadastrar regras de alerta"""
+    if request.method == 'GET':
+        offset, limit = get_pagination()
+        symbol = request.args.get('symbol')
+        if symbol:
+            symbol = symbol.strip().upper()
+        
+        return jsonify({
+            'success': True,
+            'rules': alert_engine.get_rules(symbol, offset, limit),
+            'total_rules': len(alert_engine)
+        })
+    
+    try:
+        payload = request.get_json(force=True) or {}
+        symbol = str(payload['symbol']).strip().upper()
+        if symbol not in SELECTED_STOCKS:
+            raise ValueError(f"Ação não acompanhada: {symbol}")
+        message = payload.get('message')
+        
+        if 'variation' in payload:
+            # Variação percentual sobre o último sinal (ou preço base informado)
+            base_price = payload.get('base_price',
+                                     STOCK_DATA.get(symbol, {}).get('last_signal_price'))
+            if base_price is None:
+                raise ValueError(f"Sem preço base para {symbol}")
+            rule_id = alert_engine.add_variation_rule(symbol, float(base_price),
+                                                      float(payload['variation']), message)
+        else:
+            rule_id = alert_engine.add_rule(symbol, payload['threshold'],
+                                            payload.get('direction', ABOVE), message)
+        
+        return jsonify({
+            'success': True,
+            'rule_id': rule_id
+        })
+        
+    except RuleLimitError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 429
+        
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/alerts/rules/<int:rule_id>', methods=['DELETE'])
+def api_delete_alert_rule(rule_id):
+    """Remover regra de alerta"""
+    if not alert_engine.remove_rule(rule_id):
+        return jsonify({
+            'success': False,
+            'error': f"Regra {rule_id} não encontrada"
+        }), 404
+    return jsonify({'success': True})
+
 @app.route('/api/status')
 def api_status():
     """Status da API"""
@@ -652,10 +757,10 @@ def api_status():
         'selected_stocks': SELECTED_STOCKS,
         'total_stocks': len(SELECTED_STOCKS),
         'last_update': last_update_time.isoformat() if last_update_time else None,
-        'cache_size': len(quotations_cache)
+        'cache_size': len(quotations_cache),
+        'alert_rules': len(alert_engine)
     })
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,136 @@
+"""Testes do motor de alertas comparando com uma varredura força-bruta"""
+
+import math
+import random
+
+import pytest
+
+from alerts import AlertEngine, QueueNotifier, RuleLimitError, ABOVE, BELOW
+
+
+def brute_force(rules, symbol, previous, price):
+    """Regras cruzadas entre previous e price, verificando uma a uma"""
+    if previous is None or price == previous:
+        return set()
+    fired = set()
+    for rule in rules.values():
+        if rule['symbol'] != symbol:
+            continue
+        threshold = rule['threshold']
+        if price > previous and rule['direction'] == ABOVE and previous < threshold <= price:
+            fired.add(rule['rule_id'])
+        if price < previous and rule['direction'] == BELOW and price <= threshold < previous:
+            fired.add(rule['rule_id'])
+    return fired
+
+
+def fired_ids(alerts):
+    return {alert['rule_id'] for alert in alerts}
+
+
+def test_first_quote_only_sets_reference():
+    engine = AlertEngine()
+    engine.add_rule('COGN3', 1.0, ABOVE)
+    assert engine.update('COGN3', 2.0) == []
+
+
+def test_equality_at_threshold():
+    engine = AlertEngine()
+    up = engine.add_rule('COGN3', 2.0, ABOVE)
+    down = engine.add_rule('COGN3', 2.0, BELOW)
+
+    engine.update('COGN3', 1.5)
+    # Subir até o limite dispara a regra de alta
+    assert fired_ids(engine.update('COGN3', 2.0)) == {up}
+    # Sair do limite para cima não dispara de novo
+    assert engine.update('COGN3', 2.5) == []
+    # Descer até o limite dispara a regra de baixa
+    assert fired_ids(engine.update('COGN3', 2.0)) == {down}
+    # Partir exatamente do limite para baixo não dispara de novo
+    assert engine.update('COGN3', 1.5) == []
+    # Partir exatamente do limite para cima não dispara
+    engine.update('COGN3', 2.0)
+    assert fired_ids(engine.update('COGN3', 2.5)) == set()
+
+
+def test_rule_added_after_reference_price():
+    engine = AlertEngine()
+    engine.update('COGN3', 1.75)
+    rule_id = engine.add_variation_rule('COGN3', 1.75, 10)
+    assert engine.update('COGN3', 1.90) == []
+    assert fired_ids(engine.update('COGN3', 1.93)) == {rule_id}
+
+
+def test_rule_removed_before_next_tick():
+    engine = AlertEngine()
+    engine.update('COGN3', 1.0)
+    keep = engine.add_rule('COGN3', 1.5, ABOVE)
+    drop = engine.add_rule('COGN3', 1.5, ABOVE)
+    assert engine.remove_rule(drop)
+    assert not engine.remove_rule(drop)
+    assert fired_ids(engine.update('COGN3', 2.0)) == {keep}
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    symbols = ['CASH3', 'COGN3']
+    engine = AlertEngine()
+    last_prices = {}
+
+    for _ in range(300):
+        action = rng.random()
+        rules = {rule['rule_id']: rule for rule in engine.get_rules()}
+        if action < 0.4:
+            # Limites numa grade pequena para forçar empates com os preços
+            engine.add_rule(rng.choice(symbols), rng.randint(0, 20) / 2,
+                            rng.choice([ABOVE, BELOW]))
+        elif action < 0.55 and rules:
+            engine.remove_rule(rng.choice(list(rules)))
+        else:
+            symbol = rng.choice(symbols)
+            price = rng.randint(0, 20) / 2
+            expected = brute_force(rules, symbol, last_prices.get(symbol), price)
+            assert fired_ids(engine.update(symbol, price)) == expected
+            last_prices[symbol] = price
+
+
+def test_rejects_non_finite_values():
+    engine = AlertEngine()
+    for bad in (math.nan, math.inf, -math.inf):
+        with pytest.raises(ValueError):
+            engine.add_rule('COGN3', bad)
+        with pytest.raises(ValueError):
+            engine.add_variation_rule('COGN3', bad, 10)
+        with pytest.raises(ValueError):
+            engine.add_variation_rule('COGN3', 1.75, bad)
+    assert len(engine) == 0
+
+
+def test_rule_limit():
+    engine = AlertEngine(max_rules=2)
+    first = engine.add_rule('COGN3', 1.0)
+    engine.add_rule('COGN3', 2.0)
+    with pytest.raises(RuleLimitError):
+        engine.add_rule('COGN3', 3.0)
+    engine.remove_rule(first)
+    engine.add_rule('COGN3', 3.0)
+
+
+def test_update_many_notifies_once_per_batch():
+    batches = []
+    engine = AlertEngine([batches.append])
+    engine.add_rule('CASH3', 3.5)
+    engine.add_rule('COGN3', 2.0)
+    engine.update_many({'CASH3': 3.0, 'COGN3': 1.5})
+    engine.update_many({'CASH3': 4.0, 'COGN3': 2.5})
+    assert len(batches) == 1
+    assert len(batches[0]) == 2
+
+
+def test_queue_notifier_evicts_oldest():
+    notifier = QueueNotifier(maxsize=3)
+    notifier([{'rule_id': i} for i in range(5)])
+    assert [alert['rule_id'] for alert in notifier.peek()] == [2, 3, 4]
+    assert [alert['rule_id'] for alert in notifier.drain(2)] == [2, 3]
+    assert [alert['rule_id'] for alert in notifier.drain()] == [4]